@@ -1,41 +1,216 @@
+import io
+import logging
 import os
-import tempfile
+import posixpath
+import sys
 import zipfile
 import argparse
+import xml.etree.ElementTree as ET
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from openpyxl import Workbook, load_workbook
 from datetime import datetime
 
+# Namespace used by every element inside the worksheet and shared strings XML parts
+SPREADSHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+# Namespaces of the relationship id attribute in workbook.xml and of the .rels parts
+RELATIONSHIP_ID_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PACKAGE_RELS_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# Archive and tracked emails of a worker process, set once by _init_worker instead of per folder
+_worker_zip = None
+_worker_email_set = None
+
+
+def normalize_email(email):
+    """Lower-cases and interns an email so repeated addresses share one string object."""
+    return sys.intern(email.strip().lower()) if isinstance(email, str) else ''
+
 
 def read_leave_data(leave_file_path):
     """Reads the leave data from an Excel file and returns it as a dictionary."""
     leave_data = {}
     try:
-        wb = load_workbook(leave_file_path)
-        sheet = wb.active  # Access the active sheet in the workbook
-        for row in sheet.iter_rows(min_row=2, values_only=True):
-            leave_date = row[0]  # Read the date from the first column
-            if isinstance(leave_date, str):  # If the date is in string format
-                leave_date = datetime.strptime(leave_date, '%Y-%m-%d')  # Convert it to datetime object
-            elif isinstance(leave_date, datetime):  # If it's already a datetime object
-                leave_date = leave_date  # No conversion needed
-            else:
-                continue  # Skip rows with invalid dates
-
-            emails = row[1] if row[1] else ""  # Read the emails from the second column, default to empty if None
-            email_set = {email.strip() for email in emails.split(",") if email.strip()}  # Clean and convert to a set
-
-            # Ensure the data is in the desired format
-            if leave_date not in leave_data:
-                leave_data[leave_date] = {'attendees': set()}  # Initialize the 'attendees' set
-            leave_data[leave_date]['attendees'].update(email_set)  # Add emails to the 'attendees' set
+        # Read-only mode streams the sheet instead of building the full object model
+        wb = load_workbook(leave_file_path, read_only=True, data_only=True, keep_links=False)
+        try:
+            sheet = wb.active  # Access the active sheet in the workbook
+            for row in sheet.iter_rows(min_row=2, values_only=True):
+                leave_date = row[0]  # Read the date from the first column
+                if isinstance(leave_date, str):  # If the date is in string format
+                    leave_date = datetime.strptime(leave_date, '%Y-%m-%d')  # Convert it to datetime object
+                elif isinstance(leave_date, datetime):  # If it's already a datetime object
+                    leave_date = leave_date  # No conversion needed
+                else:
+                    continue  # Skip rows with invalid dates
+
+                emails = row[1] if row[1] else ""  # Read the emails from the second column, default to empty if None
+                email_set = {normalize_email(email) for email in emails.split(",") if email.strip()}  # Clean and convert to a set
+
+                # Ensure the data is in the desired format
+                if leave_date not in leave_data:
+                    leave_data[leave_date] = {'attendees': set()}  # Initialize the 'attendees' set
+                leave_data[leave_date]['attendees'].update(email_set)  # Add emails to the 'attendees' set
+        finally:
+            wb.close()  # Read-only workbooks keep the file handle open until closed
     except Exception as e:
         print(f"Error reading leave data: {e}")
     return leave_data
 
-def extract_zip(zip_file_path, extract_to):
-    """Extracts the contents of a zip file to a specified directory."""
-    with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
-        zip_ref.extractall(extract_to)
+def parse_shared_strings(xml_file, indices):
+    """Parses only the requested entries of an xlsx shared strings table into a dict keyed by string id."""
+    shared_strings = {}
+    if not indices:
+        return shared_strings
+    last_index = max(indices)
+    index = 0
+    for _, elem in ET.iterparse(xml_file, events=('end',)):
+        if elem.tag != f'{SPREADSHEET_NS}si':
+            continue
+        if index in indices:
+            shared_strings[index] = string_item_text(elem)
+        elem.clear()
+        if index == last_index:
+            break  # Everything after the last referenced string can be skipped
+        index += 1
+    return shared_strings
+
+
+def string_item_text(elem):
+    """Returns the text of a shared string <si> or inline string <is> element."""
+    # Rich text splits one string across <r> runs; phonetic <rPh> runs are not part of the value
+    runs = elem.findall(f'{SPREADSHEET_NS}t') + elem.findall(f'{SPREADSHEET_NS}r/{SPREADSHEET_NS}t')
+    return ''.join(t.text or '' for t in runs)
+
+
+def column_index(cell_ref):
+    """Converts a cell reference such as 'E12' into a zero-based column index."""
+    index = 0
+    for char in cell_ref:
+        if not char.isalpha():
+            break
+        index = index * 26 + (ord(char.upper()) - ord('A') + 1)
+    return index - 1
+
+
+def iter_rows(sheet_file):
+    """Streams the <row> elements of a worksheet, each one is cleared once the caller moves on."""
+    for _, elem in ET.iterparse(sheet_file, events=('end',)):
+        if elem.tag == f'{SPREADSHEET_NS}row':
+            yield elem
+            elem.clear()  # Free the parsed row, only one row is kept in memory at a time
+
+
+def row_cells(row):
+    """Yields (column index, raw value) pairs for the <c> elements of a worksheet row."""
+    for position, cell in enumerate(row.iter(f'{SPREADSHEET_NS}c')):
+        ref = cell.get('r')
+        cell_type = cell.get('t')
+        if cell_type == 'inlineStr':
+            inline = cell.find(f'{SPREADSHEET_NS}is')
+            text = string_item_text(inline) if inline is not None else None
+        else:
+            value = cell.find(f'{SPREADSHEET_NS}v')
+            text = value.text if value is not None else None
+        yield (column_index(ref) if ref else position), (cell_type, text)
+
+
+def shared_string_indices(raw_values):
+    """Returns the shared string ids referenced by a collection of raw cell values."""
+    return {int(text) for cell_type, text in raw_values if cell_type == 's' and text is not None}
+
+
+def cell_value(raw_value, shared_strings):
+    """Resolves a raw cell value to a string, or None if the cell is empty."""
+    cell_type, text = raw_value
+    if text is None:
+        return None
+    if cell_type == 's':  # Shared string, stored as an index into the shared strings table
+        index = int(text)
+        if index not in shared_strings:
+            raise ValueError(f"Shared string {index} not found in the shared strings table")
+        return shared_strings[index]
+    return text
+
+
+def part_relationships(z, part_path):
+    """Returns the (type, target path) of each relationship of a part, keyed by relationship id."""
+    part_dir, part_name = posixpath.split(part_path)
+    rels_path = posixpath.join(part_dir, '_rels', f'{part_name}.rels')
+    relationships = {}
+    for relationship in ET.fromstring(z.read(rels_path)).iter(f'{PACKAGE_RELS_NS}Relationship'):
+        target = relationship.get('Target')
+        # Targets are relative to the part's folder unless they start at the archive root
+        if target.startswith('/'):
+            target = target.lstrip('/')
+        else:
+            target = posixpath.normpath(posixpath.join(part_dir, target))
+        relationships[relationship.get('Id')] = (relationship.get('Type'), target)
+    return relationships
+
+
+def workbook_parts(z):
+    """Returns the paths of the active worksheet and of the shared strings table (or None) in an xlsx archive.
+
+    Parts are located through the package relationships, as openpyxl does, rather than by their usual names.
+    """
+    workbook_path = next((target for rel_type, target in part_relationships(z, '').values()
+                          if rel_type.endswith('/officeDocument')), None)
+    if workbook_path is None:
+        raise ValueError("Workbook part not found")
+    workbook = ET.fromstring(z.read(workbook_path))
+    view = workbook.find(f'{SPREADSHEET_NS}bookViews/{SPREADSHEET_NS}workbookView')
+    active_tab = int(view.get('activeTab', 0)) if view is not None else 0
+    sheets = workbook.findall(f'{SPREADSHEET_NS}sheets/{SPREADSHEET_NS}sheet')
+    relationship_id = sheets[active_tab].get(f'{RELATIONSHIP_ID_NS}id')
+    relationships = part_relationships(z, workbook_path)
+    if relationship_id not in relationships:
+        raise ValueError(f"Active sheet relationship {relationship_id} not found")
+    shared_strings_path = next((target for rel_type, target in relationships.values()
+                                if rel_type.endswith('/sharedStrings')), None)
+    return relationships[relationship_id][1], shared_strings_path
+
+
+def read_emails(xlsx_file):
+    """Returns the values of the 'Email' column from the active sheet of an xlsx file or file-like object.
+
+    The sheet XML is streamed once, but the raw Email cells are buffered until the sheet has been read,
+    so the shared strings table only has to be resolved for the ids those cells reference.
+    """
+    with zipfile.ZipFile(xlsx_file) as z:
+        sheet_path, shared_strings_path = workbook_parts(z)
+
+        def load_shared_strings(indices):
+            if shared_strings_path is None or not indices:
+                return {}
+            with z.open(shared_strings_path) as f:
+                return parse_shared_strings(f, indices)
+
+        email_index = None
+        raw_emails = []
+        with z.open(sheet_path) as f:
+            for row in iter_rows(f):
+                if email_index is None:
+                    # The first row is the header, use it to locate the 'Email' column
+                    header = dict(row_cells(row))
+                    shared_strings = load_shared_strings(shared_string_indices(header.values()))
+                    email_index = next((column for column, raw_value in header.items()
+                                        if cell_value(raw_value, shared_strings) == 'Email'), None)
+                    if email_index is None:
+                        raise ValueError("Missing required 'Email' column")
+                    continue
+                for column, raw_value in row_cells(row):
+                    if column == email_index:
+                        raw_emails.append(raw_value)
+                        break
+        if email_index is None:
+            raise ValueError("Missing required 'Email' column")
+
+        # Strings already resolved for the header do not need another lookup
+        missing_indices = shared_string_indices(raw_emails) - shared_strings.keys()
+        shared_strings.update(load_shared_strings(missing_indices))
+
+    return [cell_value(raw_value, shared_strings) for raw_value in raw_emails]
 
 
 def generate_output_filename(meeting_name):
@@ -49,87 +224,118 @@ def generate_output_filename(meeting_name):
     return output_file_name
 
 
-def compile_attendee_data(zip_file_path, meeting_name, start_date, end_date, email_list, leave_data):
+def compile_attendee_data(zip_file_path, meeting_name, start_date, end_date, email_list, email_set, leave_data):
     """Compiles meeting attendee data from Excel files"""
-    result_dict = {}
-    with tempfile.TemporaryDirectory() as temp_dir:
-        extract_zip(zip_file_path, temp_dir)
-        meeting_reports_dir = os.path.join(temp_dir, os.listdir(temp_dir)[0])
-        for folder_name in os.listdir(meeting_reports_dir):
-            folder_path = os.path.join(meeting_reports_dir, folder_name)
-            if not os.path.isdir(folder_path):
-                print("Not a valid directory.")
-                continue
-            try:
-                folder_date = datetime.strptime(
-                    folder_name.split(' ')[0], "%Y-%m-%d")
-            except ValueError:
-                print("Invalid folder name")
-                continue
-            if not (start_date <= folder_date <= end_date):
-                continue
-            if meeting_name not in folder_name:
-                print(f"{meeting_name} not found in {folder_name}")
-                continue  # Skip this folder if the meeting name is not found
-
-            process_excel_files(folder_path, folder_date,
-                                email_list, result_dict)
-
-        # Merge result_dict with leave_data
-        for date, leave_info in leave_data.items():
-            if date in result_dict:
-                # Filter attendees from leave_info to include only those in email_list
-                filtered_attendees = leave_info['attendees'].intersection(set(email_list))
-                # Merge the filtered attendees into the result_dict
-                result_dict[date]['attendees'] = result_dict[date]['attendees'].union(filtered_attendees)
-
-        # Pass the merged dictionary to subsequent functions
-        save_to_excel(generate_output_filename(meeting_name).replace(
-            '.csv', '.xlsx'), result_dict, email_list)
-        individual_attendance_filename = generate_output_filename(
-            f"{meeting_name}_Individual_Attendance")
-        save_individual_attendee_percentages(individual_attendance_filename.replace(
-            '.csv', '.xlsx'), result_dict, leave_data, email_list)
-
-
-def process_excel_files(folder_path, folder_date, email_list, result_dict):
-    """Process each Excel file based on column names."""
-    for file_name in os.listdir(folder_path):
-        if not file_name.endswith('.xlsx'):
-            print("No xlsx files found in directory")
+    result_dict = defaultdict(lambda: {'attendees': set()})
+    tasks = []
+    # Read the reports straight from the archive, only matching folders are ever decompressed
+    with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
+        names = zip_ref.namelist()
+    if not names:
+        print("No meeting reports found in the zip file.")
+        return
+    meeting_reports_dir = names[0].split('/')[0]
+    folders = {}
+    for name in names:
+        parts = name.split('/')
+        # Reports live at <meeting reports dir>/<meeting folder>/<file>
+        if len(parts) != 3 or parts[0] != meeting_reports_dir or not parts[2]:
             continue
-        file_path = os.path.join(folder_path, file_name)
+        folders.setdefault(parts[1], []).append(name)
+
+    for folder_name, member_names in folders.items():
+        # The substring check is far cheaper than strptime, so filter on the meeting name first
+        if meeting_name not in folder_name:
+            logging.debug("%s not found in %s", meeting_name, folder_name)
+            continue  # Skip this folder if the meeting name is not found
         try:
-            workbook = load_workbook(file_path)
-            sheet = workbook.active
-            # Get the header row to identify column indices
-            header = [cell.value for cell in sheet[1]]
-            email_index = header.index('Email') if 'Email' in header else None
-            # Check if required columns are present
-            if email_index is None:
-                print(f"Missing required 'Email' column in file: {file_name}")
-                continue
-            for row in sheet.iter_rows(min_row=2, values_only=True):
-                email = row[email_index]
-                # Check if the email is in the provided email list
-                if email in email_list:
-                    result_dict.setdefault(folder_date, {'attendees': set()})['attendees'].add(email)
+            folder_date = datetime.strptime(
+                folder_name.split(' ', 1)[0], "%Y-%m-%d")
+        except ValueError:
+            logging.debug("Invalid folder name: %s", folder_name)
+            continue
+        if not (start_date <= folder_date <= end_date):
+            continue
+
+        tasks.append((member_names, folder_date))
+
+    # Folders are independent of each other, so parse them in parallel and merge afterwards
+    if tasks:
+        with ProcessPoolExecutor(max_workers=min(len(tasks), os.cpu_count() or 1),
+                                 initializer=_init_worker, initargs=(zip_file_path, email_set)) as executor:
+            futures = [executor.submit(_process_folder, member_names, folder_date)
+                       for member_names, folder_date in tasks]
+            # Merge in submission order so the output order does not depend on scheduling
+            for future in futures:
+                for date, attendees in future.result().items():
+                    # Strings come back from the worker as copies, intern them again in this process
+                    result_dict[date]['attendees'].update(map(sys.intern, attendees))
+
+    # Merge result_dict with leave_data
+    for date, leave_info in leave_data.items():
+        if date in result_dict:
+            # Filter attendees from leave_info to include only those in email_set
+            filtered_attendees = leave_info['attendees'].intersection(email_set)
+            # Merge the filtered attendees into the result_dict
+            result_dict[date]['attendees'] = result_dict[date]['attendees'].union(filtered_attendees)
+
+    # Pass the merged dictionary to subsequent functions
+    save_to_excel(generate_output_filename(meeting_name).replace(
+        '.csv', '.xlsx'), result_dict, email_set)
+    individual_attendance_filename = generate_output_filename(
+        f"{meeting_name}_Individual_Attendance")
+    save_individual_attendee_percentages(individual_attendance_filename.replace(
+        '.csv', '.xlsx'), result_dict, leave_data, email_list)
+
+
+def _init_worker(zip_file_path, email_set):
+    """Opens the archive once per worker process, so its central directory is not re-read for every folder."""
+    global _worker_zip, _worker_email_set
+    _worker_zip = zipfile.ZipFile(zip_file_path, 'r')
+    _worker_email_set = email_set
+
+
+def _process_folder(member_names, folder_date):
+    """Processes one meeting folder in a worker process and returns its attendees by date."""
+    folder_result = defaultdict(lambda: {'attendees': set()})
+    process_excel_files(_worker_zip, member_names, folder_date, _worker_email_set, folder_result)
+    return {date: data['attendees'] for date, data in folder_result.items()}
+
+
+def process_excel_files(zip_ref, member_names, folder_date, email_set, result_dict):
+    """Process each Excel file of a meeting folder inside the zip based on column names.
+
+    result_dict must be a defaultdict that creates the {'attendees': set()} entry for a new date.
+    """
+    for file_path in member_names:
+        if not file_path.endswith('.xlsx'):
+            logging.debug("Skipping non-xlsx file: %s", file_path)
+            continue
+        try:
+            # Reports are small, so hold the member in memory rather than extracting it to disk
+            report = io.BytesIO(zip_ref.read(file_path))
+            # Read the 'Email' column out of the sheet XML, keeping only tracked emails
+            matches = [email for email in map(normalize_email, read_emails(report)) if email in email_set]
+            if matches:
+                result_dict[folder_date]['attendees'].update(matches)
         except Exception as e:
             print(f"Error processing {file_path}: {e}")
 
 
-def save_to_excel(output_file_name, result_dict, email_list):
+def save_to_excel(output_file_name, result_dict, email_set):
     """Save the compiled results to an Excel file."""
-    output_workbook = Workbook()
-    output_sheet = output_workbook.active
+    output_workbook = Workbook(write_only=True)  # Rows are streamed to disk instead of kept as cells
+    output_sheet = output_workbook.create_sheet()
     output_sheet.append(['Date', 'Attendee Emails', 'Percentage'])
     total_attendees_count = 0
-    total_attendees = len(email_list)
+    total_attendees = len(email_set)  # Distinct tracked emails, after case normalization
+    # Bind the row writer and the per-attendee percentage once, outside the row loop
+    append = output_sheet.append
+    pct_of = (100.0 / total_attendees) if total_attendees > 0 else 0.0
     for date, data in result_dict.items():
-        attendees_list = list(data['attendees'])
-        attendees_count = len(attendees_list)
-        attendance_percentage = (attendees_count / total_attendees * 100) if total_attendees > 0 else 0
-        output_sheet.append([date.strftime('%Y-%m-%d'), ", ".join(attendees_list), f"{attendance_percentage:.2f}%"])
+        attendees = data['attendees']
+        attendees_count = len(attendees)
+        append([date.date().isoformat(), ", ".join(attendees), format(attendees_count * pct_of, '.2f') + '%'])
         total_attendees_count += attendees_count
     overall_percentage = (total_attendees_count / (len(result_dict) * total_attendees) * 100) if total_attendees > 0 else 0
     output_sheet.append([])
@@ -144,30 +350,25 @@ def save_individual_attendee_percentages(output_file_name, result_dict, leave_da
     print("Starting to calculate attendance percentages...")
 
     # Initialize the workbook and sheet
-    output_workbook = Workbook()
-    output_sheet = output_workbook.active
+    output_workbook = Workbook(write_only=True)  # Rows are streamed to disk instead of kept as cells
+    output_sheet = output_workbook.create_sheet()
     output_sheet.append(['Attendee', 'Percentage'])
 
-    # Dictionary to hold counts for each attendee
-    attendee_counts = {}
-
     # Count attendance for each attendee across all meetings
     print("Counting attendance for each attendee...")
-    for date, data in result_dict.items():
-        print(f"Processing data for date: {date}")
-        for attendee in data['attendees']:
-            print(f"Adding attendee: {attendee}")
-            attendee_counts[attendee] = attendee_counts.get(attendee, 0) + 1
+    attendee_counts = Counter()
+    for data in result_dict.values():
+        attendee_counts.update(data['attendees'])  # Counted in C, no per-attendee Python loop
 
     total_meetings = len(result_dict)
     print(f"Total number of meetings: {total_meetings}")
 
-    # Calculate attendance percentage and save to Excel
+    # Calculate attendance percentage and save to Excel, most frequent attendees first
     print("Calculating attendance percentages and saving to the file...")
-    for attendee, count in attendee_counts.items():
-        attendance_percentage = (count / total_meetings * 100) if total_meetings > 0 else 0
-        print(f"{attendee} attended {count} meetings, which is {attendance_percentage:.2f}%")
-        output_sheet.append([attendee, f"{attendance_percentage:.2f}%"])
+    append = output_sheet.append
+    pct_of = (100.0 / total_meetings) if total_meetings > 0 else 0.0
+    for attendee, count in attendee_counts.most_common():
+        append([attendee, format(count * pct_of, '.2f') + '%'])
 
     # Save the workbook
     output_workbook.save(output_file_name)
@@ -195,10 +396,12 @@ def main():
     start_date = datetime.strptime(args.start_date, '%Y-%m-%d')
     end_date = datetime.strptime(args.end_date, '%Y-%m-%d')
     email_list = args.email_list.split()
+    # Hashed lookups for the per-row membership checks, case-insensitive like the report emails
+    email_set = frozenset(normalize_email(email) for email in email_list)
     leave_data = read_leave_data(args.leave_file_path)
     print("This is leave data\n", leave_data)
     compile_attendee_data(zip_file_path, meeting_name,
-                          start_date, end_date, email_list, leave_data)
+                          start_date, end_date, email_list, email_set, leave_data)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,105 @@
+import importlib.util
+import io
+import os
+import unittest
+import zipfile
+
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data-extraction-script.py')
+spec = importlib.util.spec_from_file_location('data_extraction_script', SCRIPT_PATH)
+script = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(script)
+
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+
+def build_xlsx(sheets, shared_strings=None, active_tab=0, workbook_path='xl/workbook.xml',
+               shared_strings_name='sharedStrings.xml'):
+    """Builds a minimal xlsx archive in memory from raw <sheetData> XML for each sheet."""
+    workbook_dir, workbook_name = workbook_path.rsplit('/', 1)
+    sheet_entries = ''.join(f'<sheet name="Sheet{i}" sheetId="{i + 1}" r:id="rId{i + 1}"/>'
+                            for i in range(len(sheets)))
+    workbook_xml = (f'<workbook xmlns="{MAIN_NS}" xmlns:r="{REL_NS}">'
+                    f'<bookViews><workbookView activeTab="{active_tab}"/></bookViews>'
+                    f'<sheets>{sheet_entries}</sheets></workbook>')
+    rels = ''.join(f'<Relationship Id="rId{i + 1}" Type="{REL_NS}/worksheet" Target="worksheets/data{i + 1}.xml"/>'
+                   for i in range(len(sheets)))
+    if shared_strings is not None:
+        rels += f'<Relationship Id="rIdSS" Type="{REL_NS}/sharedStrings" Target="{shared_strings_name}"/>'
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as z:
+        z.writestr('_rels/.rels', f'<Relationships xmlns="{PKG_REL_NS}">'
+                                  f'<Relationship Id="rId1" Type="{REL_NS}/officeDocument" Target="{workbook_path}"/>'
+                                  f'</Relationships>')
+        z.writestr(workbook_path, workbook_xml)
+        z.writestr(f'{workbook_dir}/_rels/{workbook_name}.rels', f'<Relationships xmlns="{PKG_REL_NS}">{rels}</Relationships>')
+        for i, sheet_data in enumerate(sheets):
+            z.writestr(f'{workbook_dir}/worksheets/data{i + 1}.xml',
+                       f'<worksheet xmlns="{MAIN_NS}"><sheetData>{sheet_data}</sheetData></worksheet>')
+        if shared_strings is not None:
+            z.writestr(f'{workbook_dir}/{shared_strings_name}',
+                       f'<sst xmlns="{MAIN_NS}">{"".join(shared_strings)}</sst>')
+    buffer.seek(0)
+    return buffer
+
+
+HEADER_ROW = '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c></row>'
+
+
+class ReadEmailsTest(unittest.TestCase):
+
+    def test_shared_and_rich_text_strings(self):
+        shared_strings = ['<si><t>Name</t></si>', '<si><t>Email</t></si>',
+                          '<si><r><t>alice</t></r><r><rPr><b/></rPr><t>@x.com</t></r><rPh><t>ignored</t></rPh></si>']
+        sheet = HEADER_ROW + '<row r="2"><c r="A2" t="s"><v>0</v></c><c r="B2" t="s"><v>2</v></c></row>'
+        self.assertEqual(script.read_emails(build_xlsx([sheet], shared_strings)), ['alice@x.com'])
+
+    def test_inline_strings_and_missing_cells(self):
+        sheet = ('<row r="1"><c r="A1" t="inlineStr"><is><t>Name</t></is></c>'
+                 '<c r="C1" t="inlineStr"><is><r><t>Em</t></r><r><t>ail</t></r></is></c></row>'
+                 '<row r="2"><c r="A2" t="inlineStr"><is><t>Bob</t></is></c></row>'
+                 '<row r="3"><c r="C3" t="inlineStr"><is><t>bob@x.com</t></is></c></row>')
+        self.assertEqual(script.read_emails(build_xlsx([sheet])), ['bob@x.com'])
+
+    def test_reads_active_sheet_when_it_is_not_the_first(self):
+        summary = '<row r="1"><c r="A1" t="inlineStr"><is><t>Meeting</t></is></c></row>'
+        participants = HEADER_ROW + '<row r="2"><c r="B2" t="s"><v>2</v></c></row>'
+        shared_strings = ['<si><t>Name</t></si>', '<si><t>Email</t></si>', '<si><t>carol@x.com</t></si>']
+        report = build_xlsx([summary, participants], shared_strings, active_tab=1)
+        self.assertEqual(script.read_emails(report), ['carol@x.com'])
+
+    def test_finds_parts_through_relationships(self):
+        shared_strings = ['<si><t>Name</t></si>', '<si><t>Email</t></si>', '<si><t>dan@x.com</t></si>']
+        sheet = HEADER_ROW + '<row r="2"><c r="B2" t="s"><v>2</v></c></row>'
+        report = build_xlsx([sheet], shared_strings, workbook_path='book/Workbook.xml',
+                            shared_strings_name='SharedStrings.xml')
+        self.assertEqual(script.read_emails(report), ['dan@x.com'])
+
+    def test_missing_email_column(self):
+        sheet = '<row r="1"><c r="A1" t="inlineStr"><is><t>Name</t></is></c></row>'
+        with self.assertRaisesRegex(ValueError, "Missing required 'Email' column"):
+            script.read_emails(build_xlsx([sheet]))
+
+    def test_missing_shared_string(self):
+        sheet = HEADER_ROW + '<row r="2"><c r="B2" t="s"><v>7</v></c></row>'
+        report = build_xlsx([sheet], ['<si><t>Name</t></si>', '<si><t>Email</t></si>'])
+        with self.assertRaisesRegex(ValueError, 'Shared string 7 not found'):
+            script.read_emails(report)
+
+    def test_reads_openpyxl_workbook(self):
+        from openpyxl import Workbook
+        workbook = Workbook()
+        workbook.active.append(['Meeting'])
+        participants = workbook.create_sheet('Participants')
+        participants.append(['Name', 'Join', 'Email'])
+        participants.append(['Erin', '09:00', 'erin@x.com'])
+        workbook.active = 1
+        report = io.BytesIO()
+        workbook.save(report)
+        report.seek(0)
+        self.assertEqual(script.read_emails(report), ['erin@x.com'])
+
+
+if __name__ == '__main__':
+    unittest.main()